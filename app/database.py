@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 DATABASE_URL = "sqlite:///./task_management.db"
@@ -8,6 +8,28 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+def upgrade_schema(bind=engine):
+    # create_all() only creates missing tables, so columns and indexes added
+    # to a model later never reach a database file created before them.
+    inspector = inspect(bind)
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=bind.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+                    # Give existing rows the value new rows would get, so e.g.
+                    # created_at is a fixed time rather than NULL.
+                    if column.default is not None and column.default.is_scalar:
+                        conn.execute(table.update().values({column.name: column.default.arg}))
+                    elif column.default is not None and column.default.is_callable:
+                        conn.execute(table.update().values({column.name: column.default.arg(None)}))
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
 def get_db():
     db = SessionLocal()
     try:
@@ -3,9 +3,10 @@ from fastapi.templating import Jinja2Templates
 from fastapi.responses import RedirectResponse
 from sqlalchemy.orm import Session
 from starlette.staticfiles import StaticFiles
-from app.database import get_db, Base, engine
-from app.models import Task, User
+from app.database import Base, engine, upgrade_schema
+from app.models import Task, User, task_ids
 from app.auth import get_authenticated_user
+from app.sharding import get_shard_db, shard_router
 from app.routes import users, tasks,auth_google
 from starlette.middleware.sessions import SessionMiddleware
 import os
@@ -14,6 +15,9 @@ app = FastAPI()
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
+upgrade_schema(engine)
+shard_router.create_all()
+task_ids.claim_node()
 
 # Configure templates
 templates = Jinja2Templates(directory="app/templates")
@@ -41,7 +45,7 @@ def index(request: Request):
 @app.get("/dashboard")
 def dashboard(
     request: Request,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_shard_db),
     current_user: User = Depends(get_authenticated_user)
 ):
     # If user is not authenticated, redirect to login
@@ -49,6 +53,6 @@ def dashboard(
         return current_user
 
     # Fetch tasks for logged-in user
-    tasks = db.query(Task).filter(Task.owner_id == current_user.id).all()
+    tasks = db.query(Task).filter(Task.owner_id == current_user.id, Task.deleted_at.is_(None)).all()
     return templates.TemplateResponse("dashboard.html", {"request": request, "user": current_user, "tasks": tasks})
 
@@ -1,7 +1,72 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
-from app.database import Base
+from app.database import Base, engine
 import datetime
+import os
+import threading
+import time
+
+# Task ids must stay unique across shards so a user's tasks can move between
+# databases unchanged. Each id is seconds since 2024 in the high bits, then a
+# node number claimed by this process from the primary database, then a
+# per-second sequence. 32 + 10 + 11 bits fit in 53, so the ids remain exact
+# as JavaScript numbers. Ids are unique as long as no more than 1024
+# processes allocate at once and none makes over 2048 tasks in one second
+# (it waits for the next second instead).
+_TASK_ID_EPOCH = 1704067200
+_NODE_BITS = 10
+_SEQUENCE_BITS = 11
+
+
+class TaskIdAllocator:
+    def __init__(self, bind=None):
+        self.bind = bind  # Database holding id_nodes; the primary by default
+        self._lock = threading.Lock()
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._node = None
+        self._second = -1
+        self._sequence = 0
+
+    def claim_node(self) -> None:
+        """Claim this process's node up front.
+
+        Claiming writes to the primary database, so doing it lazily inside an
+        insert that already holds the primary's SQLite write lock would wait
+        on itself. Call this at startup, outside any transaction.
+        """
+        with self._lock:
+            if self._node is None:
+                self._node = self._new_node()
+
+    def _new_node(self) -> int:
+        bind = self.bind or engine
+        IdNode.__table__.create(bind, checkfirst=True)
+        with bind.begin() as conn:
+            result = conn.execute(IdNode.__table__.insert().values(claimed_at=datetime.datetime.utcnow()))
+        return result.inserted_primary_key[0] % (1 << _NODE_BITS)
+
+    def __call__(self) -> int:
+        with self._lock:
+            if self._node is None:
+                self._node = self._new_node()
+            while True:
+                # Never step back if the clock does.
+                second = max(int(time.time()) - _TASK_ID_EPOCH, self._second)
+                if second > self._second:
+                    self._second, self._sequence = second, 0
+                if self._sequence < 1 << _SEQUENCE_BITS:
+                    break
+                time.sleep(0.01)
+            sequence = self._sequence
+            self._sequence += 1
+            return (((second << _NODE_BITS) | self._node) << _SEQUENCE_BITS) | sequence
+
+
+task_ids = TaskIdAllocator()
+
 
 class User(Base):
     __tablename__ = "users"
@@ -25,13 +90,46 @@ class User(Base):
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (Index("uq_tasks_owner_version", "owner_id", "version", unique=True),)
 
-    id = Column(Integer, primary_key=True, index=True)
+    # 64-bit on servers for task_ids(); SQLite keeps its INTEGER rowid key.
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, index=True, default=task_ids)
     title = Column(String, index=True)
     description = Column(String)
     priority = Column(Integer, default=1)  # 1 (Low), 2 (Medium), 3 (High)
     deadline = Column(DateTime, nullable=True)
     is_completed = Column(Boolean, default=False)
     owner_id = Column(Integer, ForeignKey("users.id"))
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+    version = Column(Integer, nullable=True)  # Per-owner change counter, used as the sync cursor
+    deleted_at = Column(DateTime, nullable=True)  # Tombstone: set instead of deleting the row
+
+    owner = relationship("User", back_populates="tasks")
+
+
+class TaskVersionCounter(Base):
+    # One row per owner, in the same database as their tasks. Writes bump it
+    # with an UPDATE, which holds the row (on SQLite, the database) write lock
+    # until commit, so versions are unique and commit in increasing order.
+    __tablename__ = "task_versions"
+
+    owner_id = Column(Integer, primary_key=True, autoincrement=False)
+    version = Column(Integer, nullable=False)
+    moved = Column(Boolean, default=False)  # Set on the old shard once the owner's tasks have moved away
+
+
+class ShardAssignment(Base):
+    __tablename__ = "shard_assignments"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    shard = Column(Integer, nullable=False)
+    moving = Column(Boolean, default=False)  # Set while the rebalancer copies the user's tasks
+
+
+class IdNode(Base):
+    # One row per process that has allocated task ids; the row id is its node.
+    __tablename__ = "id_nodes"
 
-    owner = relationship("User", back_populates="tasks")
\ No newline at end of file
+    id = Column(Integer, primary_key=True)
+    claimed_at = Column(DateTime)
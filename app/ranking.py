@@ -0,0 +1,126 @@
+import heapq
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Scores are measured in days of deadline slack. Every term is linear in an
+# absolute timestamp, so the relative order of two tasks never changes as time
+# passes and a score computed at write time stays valid until the task changes.
+PRIORITY_WEIGHT = 3.0  # one priority level is worth three days of deadline
+AGE_WEIGHT = 0.1  # each day a task has been waiting is worth 0.1 days of deadline
+NO_DEADLINE_HORIZON = timedelta(days=14)  # tasks without a deadline rank as if due two weeks after creation
+
+EPOCH = datetime(1970, 1, 1)
+# Rows that predate created_at and were never backfilled rank as created on
+# this fixed date, i.e. as the oldest tasks, rather than as created "now".
+LEGACY_CREATED_AT = datetime(2024, 1, 1)
+
+
+def _days(moment: datetime) -> float:
+    return (moment - EPOCH).total_seconds() / 86400
+
+
+def task_score(task) -> float:
+    """Higher scores should be worked on first."""
+    created = task.created_at or LEGACY_CREATED_AT
+    deadline = task.deadline or created + NO_DEADLINE_HORIZON
+    return PRIORITY_WEIGHT * (task.priority or 1) - _days(deadline) - AGE_WEIGHT * _days(created)
+
+
+class TaskRanker:
+    """In-memory per-user index of pending tasks ordered by task_score().
+
+    Each user has a heap of (-score, task_id) entries. Writes push a new entry
+    and record it as the live one for the task; superseded entries are dropped
+    lazily when they reach the top of the heap. Users are loaded from the
+    database on first read. Writes that arrive while a load is running are
+    buffered and replayed over the loaded tasks; writes for users that are
+    neither loaded nor loading are ignored since a later load picks them up.
+
+    The index lives in process memory and is only kept current by writes made
+    in the same process. With several uvicorn workers, each worker misses the
+    writes handled by the others, so run a single worker when relying on
+    /tasks/next.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._heaps: Dict[int, List[Tuple[float, int]]] = {}
+        self._live: Dict[int, Dict[int, float]] = {}
+        # owner_id -> {task_id: key, or None for a discard} seen during a load
+        self._loading: Dict[int, Dict[int, Optional[float]]] = {}
+
+    def ensure_loaded(self, owner_id: int, fetch: Callable[[], Iterable]) -> None:
+        """Load a user's pending tasks from `fetch()` unless already loaded."""
+        with self._lock:
+            if owner_id in self._heaps:
+                return
+            self._loading.setdefault(owner_id, {})
+
+        live = {task.id: -task_score(task) for task in fetch() if not task.is_completed}
+
+        with self._lock:
+            if owner_id in self._heaps:
+                return
+            for task_id, key in self._loading.pop(owner_id, {}).items():
+                if key is None:
+                    live.pop(task_id, None)
+                else:
+                    live[task_id] = key
+            heap = [(key, task_id) for task_id, key in live.items()]
+            heapq.heapify(heap)
+            self._heaps[owner_id] = heap
+            self._live[owner_id] = live
+
+    def update(self, task) -> None:
+        if task.is_completed:
+            self.discard(task.owner_id, task.id)
+            return
+        key = -task_score(task)
+        with self._lock:
+            if task.owner_id in self._loading:
+                self._loading[task.owner_id][task.id] = key
+            if task.owner_id not in self._heaps:
+                return
+            if self._live[task.owner_id].get(task.id) == key:
+                return
+            self._live[task.owner_id][task.id] = key
+            heapq.heappush(self._heaps[task.owner_id], (key, task.id))
+            self._compact(task.owner_id)
+
+    def discard(self, owner_id: int, task_id: int) -> None:
+        with self._lock:
+            if owner_id in self._loading:
+                self._loading[owner_id][task_id] = None
+            if owner_id not in self._heaps:
+                return
+            self._live[owner_id].pop(task_id, None)
+            self._compact(owner_id)
+
+    def top(self, owner_id: int, limit: int) -> List[int]:
+        """Return the ids of the best `limit` pending tasks, best first."""
+        with self._lock:
+            heap = self._heaps.get(owner_id, [])
+            live = self._live.get(owner_id, {})
+            best = []
+            seen = set()
+            while heap and len(best) < limit:
+                key, task_id = heapq.heappop(heap)
+                if live.get(task_id) == key and task_id not in seen:
+                    seen.add(task_id)
+                    best.append((key, task_id))
+            for entry in best:
+                heapq.heappush(heap, entry)
+            return [task_id for _, task_id in best]
+
+    def _compact(self, owner_id: int) -> None:
+        # Rebuild once stale entries outnumber live ones so the heap stays
+        # proportional to the pending task count.
+        heap = self._heaps[owner_id]
+        live = self._live[owner_id]
+        if len(heap) > 2 * len(live) + 16:
+            heap[:] = [(key, task_id) for task_id, key in live.items()]
+            heapq.heapify(heap)
+
+
+ranker = TaskRanker()
@@ -0,0 +1,40 @@
+"""Move users' tasks between shards while the app is running.
+
+    python -m app.rebalance USER_ID SHARD [USER_ID SHARD ...]
+    python -m app.rebalance --report
+"""
+import argparse
+
+from sqlalchemy import func
+
+from app.models import Task
+from app.sharding import shard_router
+
+
+def report():
+    for index, shard in enumerate(shard_router.engines):
+        with shard_router.session(index) as db:
+            count = db.query(func.count(Task.id)).filter(Task.deleted_at.is_(None)).scalar()
+        print(f"shard {index} ({shard.url}): {count} tasks")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move users' tasks between shards.")
+    parser.add_argument("moves", nargs="*", type=int, help="pairs of USER_ID SHARD")
+    parser.add_argument("--report", action="store_true", help="print task counts per shard")
+    args = parser.parse_args()
+
+    if len(args.moves) % 2:
+        parser.error("moves must be USER_ID SHARD pairs")
+
+    shard_router.create_all()
+    for user_id, shard in zip(args.moves[::2], args.moves[1::2]):
+        shard_router.move_user(user_id, shard)
+        print(f"moved user {user_id} to shard {shard}")
+
+    if args.report or not args.moves:
+        report()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,142 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, Form
+from fastapi import APIRouter, Depends, HTTPException, Request, Form, Query
+from sqlalchemy import func, or_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models import Task, User
+from app.sharding import get_shard_db, tasks_moving
+from app.models import Task, TaskVersionCounter, User
+from app.schemas import TaskResponse, TaskSyncResponse
 from app.auth import get_authenticated_user
+from app.ranking import ranker
+from app.write_batcher import run_write
 from fastapi.responses import RedirectResponse
 from datetime import datetime
+from typing import List, Optional
 
 router = APIRouter(prefix="/tasks", tags=["Tasks"])
 
 
+def _latest_version(db: Session, owner_id: int) -> int:
+    return db.query(func.coalesce(func.max(Task.version), 0)).filter(Task.owner_id == owner_id).scalar()
+
+
+def _next_version(db: Session, owner_id: int) -> int:
+    counter = TaskVersionCounter.version
+    bumped = db.query(TaskVersionCounter).filter(TaskVersionCounter.owner_id == owner_id).update(
+        {counter: counter + 1}, synchronize_session=False
+    )
+    if not bumped:
+        # First versioned write for this owner in this database: start after
+        # whatever versions the tasks already carry.
+        try:
+            with db.begin_nested():
+                db.add(TaskVersionCounter(owner_id=owner_id, version=_latest_version(db, owner_id) + 1, moved=False))
+        except IntegrityError:
+            # Another writer created the row first; bump theirs instead.
+            return _next_version(db, owner_id)
+    version, moved = db.query(counter, TaskVersionCounter.moved).filter(
+        TaskVersionCounter.owner_id == owner_id
+    ).one()
+    if moved:
+        # The owner was moved to another shard after this request was routed.
+        raise tasks_moving()
+    return version
+
+
+def _touch(db: Session, task: Task):
+    # Every write moves the task past the owner's current sync cursor.
+    task.updated_at = datetime.utcnow()
+    task.version = _next_version(db, task.owner_id)
+
+
+def _get_task(db: Session, task_id: int, owner_id: int) -> Task:
+    task = db.query(Task).filter(Task.id == task_id, Task.owner_id == owner_id, Task.deleted_at.is_(None)).first()
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return task
+
+
+@router.get("/next", response_model=List[TaskResponse])
+def next_tasks(
+        limit: int = Query(5, ge=1, le=50),
+        db: Session = Depends(get_shard_db),
+        current_user: User = Depends(get_authenticated_user)
+):
+    if isinstance(current_user, RedirectResponse):
+        return current_user
+
+    pending = db.query(Task).filter(
+        Task.owner_id == current_user.id, Task.is_completed == False, Task.deleted_at.is_(None)
+    )
+    ranker.ensure_loaded(current_user.id, pending.all)
+
+    while True:
+        task_ids = ranker.top(current_user.id, limit)
+        tasks = {task.id: task for task in pending.filter(Task.id.in_(task_ids)).all()}
+        stale = [task_id for task_id in task_ids if task_id not in tasks]
+        if not stale:
+            return [tasks[task_id] for task_id in task_ids]
+        # Completed or deleted behind the ranker's back (a late update from an
+        # older write, or another worker); drop them and fill the gaps.
+        for task_id in stale:
+            ranker.discard(current_user.id, task_id)
+
+
+@router.get("/sync", response_model=TaskSyncResponse)
+def sync_tasks(
+        since: Optional[int] = Query(None, ge=0),
+        db: Session = Depends(get_shard_db),
+        current_user: User = Depends(get_authenticated_user)
+):
+    if isinstance(current_user, RedirectResponse):
+        return current_user
+
+    # Versions commit in increasing order, so reading the cursor first and
+    # capping the rows at it never skips a write: anything committed after
+    # this read has a higher version and is picked up by the next sync.
+    cursor = _latest_version(db, current_user.id)
+
+    # Without `since` this is a full sync: every live task, including rows
+    # written before versions existed, and no tombstones. A cursor of 0 is an
+    # ordinary cursor, so owners with only unversioned rows sync nothing new.
+    query = db.query(Task).filter(Task.owner_id == current_user.id)
+    if since is None:
+        query = query.filter(Task.deleted_at.is_(None), or_(Task.version.is_(None), Task.version <= cursor))
+    else:
+        query = query.filter(Task.version > since, Task.version <= cursor)
+
+    changed, deleted = [], []
+    for task in query.all():
+        if task.deleted_at is None:
+            changed.append(TaskResponse.model_validate(task))
+        else:
+            deleted.append(task.id)
+
+    return TaskSyncResponse(cursor=cursor, changed=changed, deleted=deleted)
+
+
 @router.post("/add")
 def add_task(
         request: Request,
         title: str = Form(...),
         description: str = Form(...),
+        priority: int = Form(1, ge=1, le=3),
         deadline: str = Form(None),
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_shard_db),
         current_user: User = Depends(get_authenticated_user)
 ):
     if deadline:
         deadline = datetime.strptime(deadline, "%Y-%m-%d")
-    new_task = Task(title=title, description=description, deadline=deadline, owner_id=current_user.id)
-    db.add(new_task)
-    db.commit()
+    owner_id = current_user.id
+
+    def write(session: Session):
+        new_task = Task(title=title, description=description, priority=priority, deadline=deadline,
+                        owner_id=owner_id)
+        _touch(session, new_task)
+        session.add(new_task)
+        return new_task
+
+    new_task = run_write(db, write)
+    ranker.update(new_task)
     return RedirectResponse(url="/dashboard", status_code=303)
 
 
@@ -31,38 +145,52 @@ def edit_task(
         task_id: int,
         title: str = Form(...),
         description: str = Form(...),
+        priority: int = Form(None, ge=1, le=3),
         deadline: str = Form(None),
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_shard_db),
         current_user: User = Depends(get_authenticated_user)
 ):
-    task = db.query(Task).filter(Task.id == task_id, Task.owner_id == current_user.id).first()
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
+    owner_id = current_user.id
 
-    task.title = title
-    task.description = description
-    if deadline:
-        task.deadline = datetime.strptime(deadline, "%Y-%m-%d")
+    def write(session: Session):
+        task = _get_task(session, task_id, owner_id)
+        task.title = title
+        task.description = description
+        if priority is not None:
+            task.priority = priority
+        if deadline:
+            task.deadline = datetime.strptime(deadline, "%Y-%m-%d")
+        _touch(session, task)
+        return task
 
-    db.commit()
+    task = run_write(db, write)
+    ranker.update(task)
     return RedirectResponse(url="/dashboard", status_code=303)
 
 
 @router.post("/complete/{task_id}")
-def complete_task(task_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_authenticated_user)):
-    task = db.query(Task).filter(Task.id == task_id, Task.owner_id == current_user.id).first()
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
-    task.is_completed = True
-    db.commit()
+def complete_task(task_id: int, db: Session = Depends(get_shard_db), current_user: User = Depends(get_authenticated_user)):
+    owner_id = current_user.id
+
+    def write(session: Session):
+        task = _get_task(session, task_id, owner_id)
+        task.is_completed = True
+        _touch(session, task)
+
+    run_write(db, write)
+    ranker.discard(owner_id, task_id)
     return RedirectResponse(url="/dashboard", status_code=303)
 
 
 @router.post("/delete/{task_id}")
-def delete_task(task_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_authenticated_user)):
-    task = db.query(Task).filter(Task.id == task_id, Task.owner_id == current_user.id).first()
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
-    db.delete(task)
-    db.commit()
+def delete_task(task_id: int, db: Session = Depends(get_shard_db), current_user: User = Depends(get_authenticated_user)):
+    owner_id = current_user.id
+
+    def write(session: Session):
+        task = _get_task(session, task_id, owner_id)
+        task.deleted_at = datetime.utcnow()
+        _touch(session, task)
+
+    run_write(db, write)
+    ranker.discard(owner_id, task_id)
     return RedirectResponse(url="/dashboard", status_code=303)
\ No newline at end of file
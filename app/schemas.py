@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List
 
 class UserCreate(BaseModel):
     username: str
@@ -29,6 +29,13 @@ class TaskResponse(BaseModel):
     deadline: Optional[datetime]
     is_completed: bool
     owner_id: Optional[int] = None
+    updated_at: Optional[datetime] = None
+    version: Optional[int] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class TaskSyncResponse(BaseModel):
+    cursor: int
+    changed: List[TaskResponse]
+    deleted: List[int]
\ No newline at end of file
@@ -0,0 +1,185 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+from fastapi import Depends, HTTPException
+from fastapi.responses import RedirectResponse
+from sqlalchemy import create_engine, func, ForeignKeyConstraint, MetaData
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.auth import get_authenticated_user
+from app.database import engine, get_db, upgrade_schema
+from app.models import Task, TaskVersionCounter, User, ShardAssignment
+
+# Shard 0 is always the primary database, which also holds users and shard
+# assignments. SHARD_URLS lists any further shards as SQLAlchemy URLs;
+# otherwise SHARD_COUNT local SQLite files are used.
+SHARD_URLS = [url.strip() for url in os.getenv("SHARD_URLS", "").split(",") if url.strip()]
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "1"))
+
+
+def _shard_urls() -> List[str]:
+    if SHARD_URLS:
+        return SHARD_URLS
+    return [f"sqlite:///./task_management_shard{i}.db" for i in range(1, SHARD_COUNT)]
+
+
+def _create_engine(url: str):
+    connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+    return create_engine(url, connect_args=connect_args)
+
+
+def _shard_metadata() -> MetaData:
+    # Shards have no users table, so their copy of the task tables drops the
+    # foreign key to it.
+    metadata = MetaData()
+    for table in (Task.__table__, TaskVersionCounter.__table__):
+        copy = table.to_metadata(metadata)
+        for constraint in [c for c in copy.constraints if isinstance(c, ForeignKeyConstraint)]:
+            copy.constraints.discard(constraint)
+            copy.foreign_keys.difference_update(constraint.elements)
+    return metadata
+
+
+def tasks_moving() -> HTTPException:
+    return HTTPException(status_code=503, detail="Tasks are being moved, try again shortly")
+
+
+class ShardRouter:
+    """Maps each user's tasks to one of several databases.
+
+    Assignments live in the primary database. With more than one shard, a user
+    without one is pinned on first access: to the primary if they already have
+    tasks there (everything written before sharding was enabled), otherwise to
+    owner_id % shard count.
+    """
+
+    def __init__(self, primary=engine, urls: List[str] = None):
+        self.engines = [primary] + [_create_engine(url) for url in (urls or [])]
+        self._sessions = [sessionmaker(autocommit=False, autoflush=False, bind=shard) for shard in self.engines]
+
+    def create_all(self):
+        metadata = _shard_metadata()
+        for shard in self.engines[1:]:
+            metadata.create_all(bind=shard)
+            upgrade_schema(shard)
+
+    def session(self, shard: int) -> Session:
+        return self._sessions[shard]()
+
+    def assignment(self, db: Session, owner_id: int) -> ShardAssignment:
+        if len(self.engines) == 1:
+            # Sharding is off: nothing to look up, and pinning users now would
+            # keep them on the primary once more shards are added.
+            return ShardAssignment(user_id=owner_id, shard=0, moving=False)
+        assignment = db.get(ShardAssignment, owner_id)
+        if assignment is None:
+            with self.session(0) as primary:
+                has_tasks = primary.query(Task.id).filter(Task.owner_id == owner_id).first() is not None
+            shard = 0 if has_tasks else owner_id % len(self.engines)
+            try:
+                db.add(ShardAssignment(user_id=owner_id, shard=shard, moving=False))
+                db.commit()
+            except IntegrityError:
+                # A concurrent first request pinned the user already.
+                db.rollback()
+            assignment = db.get(ShardAssignment, owner_id)
+        return assignment
+
+    def query_all(self, query: Callable[[Session], list]) -> list:
+        """Run `query` against every shard in parallel and concatenate the results.
+
+        For admin reporting, e.g.
+        shard_router.query_all(lambda db: db.query(Task).filter(Task.is_completed == False).all()).
+        """
+        def run(shard):
+            with self.session(shard) as db:
+                results = query(db)
+                db.expunge_all()
+                return results
+
+        with ThreadPoolExecutor(max_workers=len(self.engines)) as pool:
+            return [row for rows in pool.map(run, range(len(self.engines))) for row in rows]
+
+    def move_user(self, owner_id: int, target: int):
+        """Move all of a user's tasks to `target` while the app keeps serving.
+
+        Requests for the user get 503 during the move; everyone else is
+        unaffected. Task ids and versions are copied unchanged, so ranking and
+        sync cursors stay valid.
+        """
+        if not 0 <= target < len(self.engines):
+            raise ValueError(f"No shard {target}")
+
+        with self.session(0) as primary:
+            assignment = self.assignment(primary, owner_id)
+            source = assignment.shard
+            if source == target:
+                return
+            assignment.moving = True
+            primary.commit()
+
+            switched = False
+            try:
+                with self.session(source) as src, self.session(target) as dst:
+                    # Every task write bumps the owner's version counter, so
+                    # holding it waits out writes already routed to the source
+                    # and blocks later ones until the move commits. Those then
+                    # see the counter marked as moved and fail with 503.
+                    version = self._claim_counter(src, owner_id)
+                    tasks = src.query(Task).filter(Task.owner_id == owner_id).all()
+
+                    columns = [column.name for column in Task.__table__.columns]
+                    dst.query(Task).filter(Task.owner_id == owner_id).delete()
+                    dst.add_all([Task(**{name: getattr(task, name) for name in columns}) for task in tasks])
+                    dst.merge(TaskVersionCounter(owner_id=owner_id, version=version, moved=False))
+                    dst.commit()
+
+                    # When the source is the primary, src already holds its
+                    # write lock, so flip the assignment in that transaction.
+                    flip = src if source == 0 else primary
+                    flip.query(ShardAssignment).filter(ShardAssignment.user_id == owner_id).update(
+                        {ShardAssignment.shard: target, ShardAssignment.moving: False}, synchronize_session=False
+                    )
+                    if flip is primary:
+                        primary.commit()
+                        switched = True
+
+                    src.query(Task).filter(Task.owner_id == owner_id).delete()
+                    src.commit()
+                    switched = True
+            except Exception:
+                if not switched:
+                    primary.rollback()
+                    assignment.moving = False
+                    primary.commit()
+                raise
+
+    def _claim_counter(self, db: Session, owner_id: int) -> int:
+        counter = db.query(TaskVersionCounter).filter(TaskVersionCounter.owner_id == owner_id)
+        if not counter.update({TaskVersionCounter.moved: True}, synchronize_session=False):
+            latest = db.query(func.coalesce(func.max(Task.version), 0)).filter(Task.owner_id == owner_id).scalar()
+            db.add(TaskVersionCounter(owner_id=owner_id, version=latest, moved=True))
+            db.flush()
+        return db.query(TaskVersionCounter.version).filter(TaskVersionCounter.owner_id == owner_id).scalar()
+
+
+shard_router = ShardRouter(urls=_shard_urls())
+
+
+def get_shard_db(db: Session = Depends(get_db), current_user: User = Depends(get_authenticated_user)):
+    """Session for the current user's task shard."""
+    if isinstance(current_user, RedirectResponse):
+        yield db
+        return
+
+    assignment = shard_router.assignment(db, current_user.id)
+    if assignment.moving:
+        raise tasks_moving()
+
+    shard_db = shard_router.session(assignment.shard)
+    try:
+        yield shard_db
+    finally:
+        shard_db.close()
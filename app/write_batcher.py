@@ -0,0 +1,135 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.database import engine
+
+# Opt-in: set GROUP_COMMIT=1 to route task writes through the batcher.
+GROUP_COMMIT = os.getenv("GROUP_COMMIT", "").lower() in ("1", "true", "yes")
+BATCH_WINDOW_SECONDS = float(os.getenv("GROUP_COMMIT_WINDOW_MS", "5")) / 1000
+MAX_BATCH_SIZE = 128
+
+Write = Callable[[Session], object]
+
+
+class WriteBatcher:
+    """Single writer thread that commits many mutations in one transaction.
+
+    submit() hands a function to the writer and blocks until the transaction
+    containing it has committed, so callers only see results once they are
+    durable. The writer waits up to BATCH_WINDOW_SECONDS after the first
+    mutation for others to arrive, applies them in order in one session, then
+    commits once.
+
+    Each mutation runs in its own savepoint, so one that raises is rolled back
+    and reported to its caller while the rest of the batch still commits
+    together. If the commit itself fails, every caller in the batch gets the
+    error.
+    """
+
+    def __init__(self, bind=engine, window: float = BATCH_WINDOW_SECONDS, max_batch: int = MAX_BATCH_SIZE):
+        # expire_on_commit=False keeps returned objects readable after the
+        # writer's session has moved on to the next batch.
+        self._session_factory = sessionmaker(bind=bind, autoflush=False, expire_on_commit=False)
+        self._window = window
+        self._max_batch = max_batch
+        self._queue: "queue.Queue[Tuple[Write, Future]]" = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, write: Write):
+        self._ensure_started()
+        future = Future()
+        self._queue.put((write, future))
+        return future.result()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="write-batcher", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                self._commit_batch(batch)
+            except Exception as e:
+                # Never let the writer die with callers still waiting on it.
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _collect(self) -> List[Tuple[Write, Future]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self._window
+        while len(batch) < self._max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _commit_batch(self, batch: List[Tuple[Write, Future]]):
+        with self._session_factory() as session:
+            if session.get_bind().dialect.name == "sqlite":
+                # pysqlite only opens a transaction before DML, so a savepoint
+                # ahead of the first write would start (and its release would
+                # commit) a transaction of its own.
+                session.execute(text("BEGIN IMMEDIATE"))
+
+            outcomes = []
+            for write, _ in batch:
+                try:
+                    with session.begin_nested():
+                        outcomes.append((True, write(session)))
+                except Exception as e:
+                    outcomes.append((False, e))
+
+            raw_connection = session.connection().connection
+            try:
+                session.commit()
+            except Exception:
+                # A failed COMMIT can leave the database transaction open while
+                # SQLAlchemy treats it as ended and skips the pool's rollback,
+                # so end it here before the connection is reused.
+                raw_connection.rollback()
+                raise
+
+        for (_, future), (ok, outcome) in zip(batch, outcomes):
+            if ok:
+                future.set_result(outcome)
+            else:
+                future.set_exception(outcome)
+
+
+# One writer per database, so each shard batches its own writes.
+_batchers = {}
+_batchers_lock = threading.Lock()
+
+
+def _batcher_for(bind) -> WriteBatcher:
+    with _batchers_lock:
+        if bind not in _batchers:
+            _batchers[bind] = WriteBatcher(bind=bind)
+        return _batchers[bind]
+
+
+def run_write(db: Session, write: Write):
+    """Apply `write` and commit it, through the batcher when GROUP_COMMIT is on."""
+    if GROUP_COMMIT:
+        return _batcher_for(db.get_bind()).submit(write)
+    result = write(db)
+    db.commit()
+    return result
@@ -0,0 +1,88 @@
+"""Write throughput of per-request commits versus the group-commit batcher.
+
+Run from the repository root:
+
+    python -m benchmarks.group_commit [--threads 32] [--writes 2000]
+
+Each writer thread inserts tasks into a scratch SQLite file, either committing
+every insert itself (what each request does by default) or submitting it to
+a WriteBatcher that commits many inserts per transaction.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import Task, task_ids
+from app.write_batcher import WriteBatcher
+
+
+def make_engine(path):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False, "timeout": 30})
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def insert(session, n):
+    session.add(Task(title=f"task {n}", description="benchmark", owner_id=1))
+
+
+def run_threads(threads, writes, work):
+    per_thread = writes // threads
+
+    def worker(offset):
+        for n in range(offset, offset + per_thread):
+            work(n)
+
+    pool = [threading.Thread(target=worker, args=(i * per_thread,)) for i in range(threads)]
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return per_thread * threads / (time.perf_counter() - start)
+
+
+def per_request(engine, threads, writes):
+    Session = sessionmaker(bind=engine)
+
+    def work(n):
+        session = Session()
+        try:
+            insert(session, n)
+            session.commit()
+        finally:
+            session.close()
+
+    return run_threads(threads, writes, work)
+
+
+def group_commit(engine, threads, writes):
+    batcher = WriteBatcher(bind=engine)
+    return run_threads(threads, writes, lambda n: batcher.submit(lambda session: insert(session, n)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--writes", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Claim the task id node from scratch rather than the app's database.
+        task_ids.bind = make_engine(os.path.join(tmp, "primary.db"))
+        task_ids.claim_node()
+        for name, bench in (("per-request commit", per_request), ("group commit", group_commit)):
+            engine = make_engine(os.path.join(tmp, name.replace(" ", "_") + ".db"))
+            rate = bench(engine, args.threads, args.writes)
+            engine.dispose()
+            print(f"{name:>20}: {rate:8.0f} writes/s")
+
+
+if __name__ == "__main__":
+    main()
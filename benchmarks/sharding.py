@@ -0,0 +1,60 @@
+"""Write throughput of the task add route as the number of task shards grows.
+
+Run from the repository root:
+
+    python -m benchmarks.sharding [--threads 32] [--writes 4000] [--shards 1 2 4 8]
+
+Each writer thread acts as one user. Every write goes the way a request does:
+ShardRouter.assignment() on the primary picks the shard, then add_task() runs
+against a session for it, bumping the user's version counter and committing.
+All databases are scratch SQLite files.
+"""
+import argparse
+import os
+import tempfile
+from types import SimpleNamespace
+
+from benchmarks.group_commit import make_engine, run_threads
+from app.models import task_ids
+from app.routes import tasks
+from app.sharding import ShardRouter
+
+
+def sharded(tmp, shards, threads, writes):
+    primary = make_engine(os.path.join(tmp, f"{shards}_0.db"))
+    router = ShardRouter(primary=primary, urls=[f"sqlite:///{os.path.join(tmp, f'{shards}_{i}.db')}"
+                                                for i in range(1, shards)])
+    router.create_all()
+    task_ids.bind = primary
+    task_ids.claim_node()
+    per_thread = writes // threads
+
+    def work(n):
+        user = SimpleNamespace(id=n // per_thread + 1)
+        with router.session(0) as db:
+            shard = router.assignment(db, user.id).shard
+        with router.session(shard) as shard_db:
+            tasks.add_task(request=None, title=f"task {n}", description="benchmark", priority=1, deadline=None,
+                           db=shard_db, current_user=user)
+
+    rate = run_threads(threads, writes, work)
+    for engine in router.engines:
+        engine.dispose()
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--writes", type=int, default=4000)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for shards in args.shards:
+            rate = sharded(tmp, shards, args.threads, args.writes)
+            print(f"{shards:>3} shards: {rate:8.0f} writes/s")
+
+
+if __name__ == "__main__":
+    main()
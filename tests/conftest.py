@@ -0,0 +1,41 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import task_ids
+
+
+def make_engine(path):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+@pytest.fixture(scope="session", autouse=True)
+def id_nodes(tmp_path_factory):
+    # Keep task id node claims out of the app's own database.
+    primary = make_engine(tmp_path_factory.mktemp("ids") / "primary.db")
+    task_ids.bind = primary
+    task_ids.claim_node()
+    yield
+    primary.dispose()
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = make_engine(tmp_path / "tasks.db")
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def make_session(engine):
+    return sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+
+@pytest.fixture
+def user():
+    return SimpleNamespace(id=1)
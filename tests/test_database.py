@@ -0,0 +1,21 @@
+from sqlalchemy import create_engine, text
+
+from app.database import upgrade_schema
+
+
+def test_upgrade_schema_backfills_new_columns(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE tasks (id INTEGER PRIMARY KEY, title VARCHAR, description VARCHAR, "
+                          "priority INTEGER, deadline DATETIME, is_completed BOOLEAN, owner_id INTEGER)"))
+        conn.execute(text("INSERT INTO tasks (title, description, priority, is_completed, owner_id) "
+                          "VALUES ('old', 'd', 1, 0, 1), ('older', 'd', 1, 0, 1)"))
+
+    upgrade_schema(engine)
+
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT created_at, version, deleted_at FROM tasks")).all()
+    assert rows[0].created_at is not None
+    assert rows[0].created_at == rows[1].created_at
+    assert all(row.version is None and row.deleted_at is None for row in rows)
+    engine.dispose()
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from app.models import Task
+from app.ranking import TaskRanker, task_score
+from app.routes import tasks
+
+NOW = datetime(2026, 1, 1)
+
+
+def make_task(task_id, priority=1, due_in_days=None, owner_id=1):
+    deadline = NOW + timedelta(days=due_in_days) if due_in_days is not None else None
+    return SimpleNamespace(id=task_id, owner_id=owner_id, priority=priority, deadline=deadline,
+                           created_at=NOW, is_completed=False)
+
+
+def test_orders_by_priority_and_deadline():
+    ranker = TaskRanker()
+    tasks = [make_task(1, 1, 1), make_task(2, 3, 5), make_task(3, 2), make_task(4, 1, 30)]
+    ranker.ensure_loaded(1, lambda: tasks)
+
+    assert ranker.top(1, 3) == [2, 1, 3]
+    assert ranker.top(1, 10) == [2, 1, 3, 4]
+
+
+def test_update_and_discard():
+    ranker = TaskRanker()
+    tasks = [make_task(1, 1, 1), make_task(2, 3, 5), make_task(3, 1, 30)]
+    ranker.ensure_loaded(1, lambda: tasks)
+
+    tasks[2].priority = 3
+    tasks[2].deadline = NOW
+    ranker.update(tasks[2])
+    assert ranker.top(1, 10) == [3, 2, 1]
+
+    ranker.discard(1, 3)
+    assert ranker.top(1, 10) == [2, 1]
+
+    tasks[0].is_completed = True
+    ranker.update(tasks[0])
+    assert ranker.top(1, 10) == [2]
+
+
+def test_top_does_not_repeat_tasks():
+    ranker = TaskRanker()
+    task = make_task(1, 1)
+    ranker.ensure_loaded(1, lambda: [task])
+    task.priority = 2
+    ranker.update(task)
+    task.priority = 1
+    ranker.update(task)
+
+    assert ranker.top(1, 5) == [1]
+
+
+def test_writes_during_load_are_kept():
+    ranker = TaskRanker()
+    loaded = [make_task(1, 1), make_task(2, 1)]
+
+    def fetch():
+        # Commits that land after the read but before the heap is installed.
+        ranker.update(make_task(3, 3))
+        ranker.discard(1, 2)
+        return loaded
+
+    ranker.ensure_loaded(1, fetch)
+
+    assert ranker.top(1, 10) == [3, 1]
+
+
+def test_writes_for_unloaded_users_are_ignored():
+    ranker = TaskRanker()
+    ranker.update(make_task(1, owner_id=7))
+
+    assert ranker.top(7, 5) == []
+
+
+def test_missing_created_at_ranks_as_old_and_stable():
+    legacy = make_task(1)
+    legacy.created_at = None
+    first = task_score(legacy)
+
+    assert task_score(legacy) == first
+    assert task_score(legacy) > task_score(make_task(2))
+
+
+def test_next_skips_tasks_finished_behind_the_ranker(make_session):
+    user = SimpleNamespace(id=101)
+    db = make_session()
+    for title in ("a", "b", "c"):
+        tasks.add_task(request=None, title=title, description="d", priority=1, deadline=None,
+                       db=db, current_user=user)
+    assert len(tasks.next_tasks(limit=3, db=db, current_user=user)) == 3
+
+    # Completed without the ranker hearing about it, e.g. by another worker.
+    db.query(Task).filter(Task.owner_id == user.id, Task.title == "a").update({Task.is_completed: True})
+    db.commit()
+
+    titles = [task.title for task in tasks.next_tasks(limit=3, db=db, current_user=user)]
+    assert sorted(titles) == ["b", "c"]
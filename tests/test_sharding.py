@@ -0,0 +1,116 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateTable
+
+from app.models import ShardAssignment, Task, TaskIdAllocator
+from app.routes import tasks
+from app.sharding import ShardRouter, _shard_metadata
+from tests.conftest import make_engine
+
+
+@pytest.fixture
+def router(tmp_path):
+    router = ShardRouter(primary=make_engine(tmp_path / "primary.db"), urls=[f"sqlite:///{tmp_path / 'shard1.db'}"])
+    router.create_all()
+    yield router
+    for shard in router.engines:
+        shard.dispose()
+
+
+def add(db, user, title):
+    tasks.add_task(request=None, title=title, description="d", priority=1, deadline=None, db=db, current_user=user)
+
+
+def snapshot(db, owner_id):
+    return sorted((task.id, task.title, task.version) for task in db.query(Task).filter(Task.owner_id == owner_id))
+
+
+def test_move_user_round_trip(router):
+    user = SimpleNamespace(id=2)
+    with router.session(0) as primary:
+        assert router.assignment(primary, user.id).shard == 0
+
+    with router.session(0) as db:
+        add(db, user, "a")
+        add(db, user, "b")
+        before = snapshot(db, user.id)
+
+    router.move_user(user.id, 1)
+    with router.session(0) as primary:
+        assert router.assignment(primary, user.id).shard == 1
+    with router.session(0) as db:
+        assert snapshot(db, user.id) == []
+    with router.session(1) as db:
+        assert snapshot(db, user.id) == before
+        add(db, user, "c")
+
+    router.move_user(user.id, 0)
+    with router.session(0) as db:
+        after = snapshot(db, user.id)
+        assert after[:2] == before
+        assert [(title, version) for _, title, version in after[2:]] == [("c", 3)]
+    with router.session(1) as db:
+        assert snapshot(db, user.id) == []
+
+
+def test_writes_routed_before_a_move_are_refused(router):
+    user = SimpleNamespace(id=2)
+    with router.session(0) as db:
+        add(db, user, "a")
+
+    stale = router.session(0)
+    router.move_user(user.id, 1)
+
+    with pytest.raises(HTTPException) as error:
+        add(stale, user, "late")
+    assert error.value.status_code == 503
+    stale.close()
+    with router.session(0) as db:
+        assert snapshot(db, user.id) == []
+
+
+def test_concurrent_first_access_pins_user_once(router):
+    barrier = threading.Barrier(4)
+    shards = []
+
+    def first_request():
+        with router.session(0) as primary:
+            barrier.wait()
+            shards.append(router.assignment(primary, 3).shard)
+
+    threads = [threading.Thread(target=first_request) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert shards == [1, 1, 1, 1]
+    with router.session(0) as primary:
+        assert primary.query(ShardAssignment).count() == 1
+
+
+def test_shard_tables_have_no_users_foreign_key():
+    for table in _shard_metadata().sorted_tables:
+        assert "REFERENCES" not in str(CreateTable(table).compile(dialect=postgresql.dialect()))
+
+
+def test_single_shard_does_not_pin_users(tmp_path):
+    router = ShardRouter(primary=make_engine(tmp_path / "primary.db"))
+    with router.session(0) as primary:
+        assert router.assignment(primary, 5).shard == 0
+        assert primary.query(ShardAssignment).count() == 0
+    router.engines[0].dispose()
+
+
+def test_task_ids_unique_across_processes(engine):
+    first, second = TaskIdAllocator(bind=engine), TaskIdAllocator(bind=engine)
+
+    # More than one second's worth of sequence numbers from each "process".
+    ids = [first() for _ in range(2100)] + [second() for _ in range(2100)]
+
+    assert len(set(ids)) == len(ids)
+    assert max(ids) < 2 ** 53
@@ -0,0 +1,84 @@
+import threading
+from types import SimpleNamespace
+
+from app.models import Task
+from app.routes import tasks
+
+
+def add(db, user, title, priority=1):
+    tasks.add_task(request=None, title=title, description="d", priority=priority, deadline=None,
+                   db=db, current_user=user)
+
+
+def sync(db, user, since=None):
+    return tasks.sync_tasks(since=since, db=db, current_user=user)
+
+
+def test_sync_returns_only_changes_and_tombstones(make_session, user):
+    db = make_session()
+    add(db, user, "a")
+    add(db, user, "b")
+    add(db, user, "c")
+
+    full = sync(db, user)
+    assert full.cursor == 3
+    assert sorted(task.title for task in full.changed) == ["a", "b", "c"]
+    assert full.deleted == []
+
+    ids = {task.title: task.id for task in full.changed}
+    tasks.complete_task(task_id=ids["a"], db=db, current_user=user)
+    tasks.delete_task(task_id=ids["b"], db=db, current_user=user)
+
+    delta = sync(db, user, since=full.cursor)
+    assert delta.cursor == 5
+    assert [(task.title, task.is_completed) for task in delta.changed] == [("a", True)]
+    assert delta.deleted == [ids["b"]]
+
+    assert sync(db, user, since=delta.cursor).changed == []
+    assert sorted(task.title for task in sync(db, user).changed) == ["a", "c"]
+
+
+def test_sync_is_per_owner(make_session, user):
+    other = SimpleNamespace(id=2)
+    db = make_session()
+    add(db, user, "mine")
+    add(db, other, "theirs")
+
+    assert [task.title for task in sync(db, user).changed] == ["mine"]
+    assert sync(db, other).cursor == 1
+
+
+def test_concurrent_writes_get_distinct_versions(make_session, user):
+    barrier = threading.Barrier(8)
+
+    def write(n):
+        db = make_session()
+        task = Task(title=f"t{n}", description="d", owner_id=user.id)
+        barrier.wait()
+        tasks._touch(db, task)
+        db.add(task)
+        db.commit()
+        db.close()
+
+    threads = [threading.Thread(target=write, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    db = make_session()
+    versions = sorted(version for (version,) in db.query(Task.version).all())
+    assert versions == list(range(1, 9))
+
+
+def test_unversioned_tasks_sync_once(make_session, user):
+    db = make_session()
+    db.add(Task(title="legacy", description="d", owner_id=user.id))
+    db.commit()
+
+    full = sync(db, user)
+    assert full.cursor == 0
+    assert [task.title for task in full.changed] == ["legacy"]
+
+    delta = sync(db, user, since=full.cursor)
+    assert delta.changed == [] and delta.deleted == []
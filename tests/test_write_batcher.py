@@ -0,0 +1,87 @@
+import sqlite3
+from concurrent.futures import Future
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+
+from app.models import Task
+from app.write_batcher import WriteBatcher
+
+
+def submit_all(batcher, writes):
+    # Queue everything before the writer starts so it all lands in one batch
+    # regardless of thread scheduling.
+    futures = []
+    for write in writes:
+        future = Future()
+        batcher._queue.put((write, future))
+        futures.append(future)
+    batcher._ensure_started()
+
+    outcomes = []
+    for future in futures:
+        try:
+            outcomes.append(future.result(timeout=10))
+        except Exception as e:
+            outcomes.append(e)
+    return outcomes
+
+
+def insert(title):
+    def write(session):
+        session.add(Task(title=title, description="d", owner_id=1))
+        return title
+    return write
+
+
+def insert_then_fail(session):
+    session.add(Task(title="bad", description="d", owner_id=1))
+    session.flush()
+    raise LookupError("Task not found")
+
+
+def test_failing_write_does_not_split_batch(engine, make_session):
+    commits = []
+    event.listen(engine, "commit", lambda conn: commits.append(1))
+    batcher = WriteBatcher(bind=engine, window=0.01)
+
+    outcomes = submit_all(batcher, [insert("a"), insert_then_fail, insert("b"), insert("c")])
+
+    assert outcomes[0] == "a" and outcomes[2] == "b" and outcomes[3] == "c"
+    assert isinstance(outcomes[1], LookupError)
+    assert len(commits) == 1
+    db = make_session()
+    assert sorted(title for (title,) in db.query(Task.title).all()) == ["a", "b", "c"]
+
+
+def test_writer_survives_unexpected_errors(engine, make_session):
+    batcher = WriteBatcher(bind=engine, window=0.01)
+    real_factory = batcher._session_factory
+
+    def broken_factory():
+        batcher._session_factory = real_factory
+        raise RuntimeError("database unavailable")
+
+    batcher._session_factory = broken_factory
+    with pytest.raises(RuntimeError):
+        batcher.submit(insert("lost"))
+
+    assert batcher.submit(insert("kept")) == "kept"
+    db = make_session()
+    assert [title for (title,) in db.query(Task.title).all()] == ["kept"]
+
+
+def test_failed_commit_writes_nothing(engine, make_session, monkeypatch):
+    def refuse(dbapi_connection):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(engine.dialect, "do_commit", refuse)
+    batcher = WriteBatcher(bind=engine, window=0.01)
+
+    outcomes = submit_all(batcher, [insert("a"), insert("b")])
+
+    assert all(isinstance(outcome, OperationalError) for outcome in outcomes)
+    monkeypatch.undo()
+    db = make_session()
+    assert db.query(Task).count() == 0